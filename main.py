@@ -1,70 +1,78 @@
 import time
 import argparse
-import re
 import csv
+import logging
 import os
+import queue
+import multiprocessing
+import multiprocessing.util
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from scraper import BlinkitAPIScraper
-from processor import BlinkitProcessor
+from processor import BlinkitProcessor, CSV_FIELDNAMES
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
-def extract_category_name(url):
-    """
-    Extract category information from URL
-    Format: l1_category_l2_category_l1_id_l2_id (e.g., munchies_bhujia-mixtures_1237_1178)
-    """
-    # Parse URL to extract category information
-    pattern = r"/cn/([^/]+)/([^/]+)/cid/(\d+)/(\d+)"
-    match = re.search(pattern, url)
-    
-    if match:
-        l1_category = match.group(1)
-        l2_category = match.group(2)
-        l1_category_id = match.group(3)
-        l2_category_id = match.group(4)
-        
-        return f"{l1_category}_{l2_category}_{l1_category_id}_{l2_category_id}"
-    
-    # Fallback if pattern doesn't match
-    parts = url.split("/")
-    parts = [p for p in parts if p]
-    
-    if len(parts) >= 2:
-        return f"{parts[-2]}_{parts[-1]}"
-    
-    return "category"
+logger = logging.getLogger(__name__)
+
+# 1 MiB read buffer so CSV scans issue fewer, larger read() calls
+CSV_BUFFER_SIZE = 1 << 20
+
+# Single-pass slug tables: ASCII uppercase -> lowercase, plus space -> separator
+_LOWERCASE = {c: c.lower() for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"}
+_SLUG_DASH = str.maketrans({**_LOWERCASE, " ": "-"})
+_SLUG_UNDER = str.maketrans({**_LOWERCASE, " ": "_"})
+
+# Requests the browser never needs to make: only the listing API responses are used.
+# Stylesheets stay allowed since infinite scroll depends on the page's layout.
+# The trailing '*' also matches asset URLs with a query string (image.png?w=200).
+BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.webp*", "*.avif*", "*.gif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.mp4*", "*.webm*",
+    # Analytics and ad trackers: extra requests and performance log entries, no data
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*"
+]
+
+# Browser owned by the current worker process, reused for every location it scrapes
+_worker_driver = None
 
 def build_category_url(l1_category, l1_category_id, l2_category, l2_category_id):
     """
     Build the category URL from category components
     """
-    l1_slug = l1_category.lower().replace(" ", "-")
-    l2_slug = l2_category.lower().replace(" ", "-")
+    l1_slug = l1_category.translate(_SLUG_DASH)
+    l2_slug = l2_category.translate(_SLUG_DASH)
     return f"https://blinkit.com/cn/{l1_slug}/{l2_slug}/cid/{l1_category_id}/{l2_category_id}"
 
 def read_csv_file(file_path):
     """Read data from a CSV file and return as a list of dictionaries"""
     if not os.path.exists(file_path):
-        print(f"Error: File not found - {file_path}")
+        logger.error("File not found - %s", file_path)
         return []
     
-    data = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                data.append(row)
-        return data
+        # Bulk-parse in pandas' C tokenizer; keep every value as a plain string like DictReader did
+        with open(file_path, 'r', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as file:
+            return pd.read_csv(file, dtype=str, keep_default_na=False).to_dict('records')
     except Exception as e:
-        print(f"Error reading {file_path}: {str(e)}")
+        logger.error("Error reading %s: %s", file_path, e)
         return []
 
 def setup_driver():
     """Setup the Chrome driver with proper options for network monitoring"""
     options = Options()
     
-    # Enable performance logging
+    # Enable performance logging, limited to the network events extract_api_responses reads
     options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    
+    # Product images aren't needed, only the listing API responses
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.add_argument("--blink-settings=imagesEnabled=false")
     
     # Make the browser less detectable
     options.add_argument("--disable-blink-features=AutomationControlled")
@@ -76,9 +84,14 @@ def setup_driver():
     # Additional options for stability
     options.add_argument("--disable-notifications")
     options.add_argument("--disable-popup-blocking")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
     
     # Uncomment to hide the browser
-    options.add_argument("--headless")
+    options.add_argument("--headless=new")
+    
+    # driver.get() returns at DOMContentLoaded; the scraper waits for the listing data itself
+    options.page_load_strategy = "eager"
     
     driver = webdriver.Chrome(options=options)
     driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
@@ -89,156 +102,334 @@ def setup_driver():
         """
     })
     
+    # Block images, fonts, media and trackers at the network layer (prefs above only stop <img> loads)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    
     return driver
 
+def prepare_categories(categories):
+    """
+    Build the (url, category_pattern, category_info) tuple for each category row
+    
+    These only depend on the category, so they are computed once up front
+    instead of once per location. Incomplete rows are dropped here.
+    """
+    prepared = []
+    for category in categories:
+        l1_category = category.get("l1_category", "").strip()
+        l1_category_id = category.get("l1_category_id", "").strip()
+        l2_category = category.get("l2_category", "").strip()
+        l2_category_id = category.get("l2_category_id", "").strip()
+        
+        if not (l1_category and l1_category_id and l2_category and l2_category_id):
+            logger.warning("Skipping incomplete category entry: %s", category)
+            continue
+        
+        url = build_category_url(l1_category, l1_category_id, l2_category, l2_category_id)
+        category_pattern = f"{l1_category.translate(_SLUG_UNDER)}_{l2_category.translate(_SLUG_UNDER)}_{l1_category_id}_{l2_category_id}"
+        category_info = {
+            'l1_category': l1_category,
+            'l1_category_id': l1_category_id,
+            'l2_category': l2_category,
+            'l2_category_id': l2_category_id
+        }
+        prepared.append((url, category_pattern, category_info))
+    
+    return prepared
+
+def configure_logging(level):
+    """Configure logging for the main process and each pool worker"""
+    logging.basicConfig(level=level, format="%(asctime)s %(levelname)s [%(processName)s] %(message)s")
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+        logger.info("Browser session closed")
+    except:
+        pass
+
+def get_worker_driver():
+    """Return this process's browser, starting it on first use"""
+    global _worker_driver
+    if _worker_driver is None:
+        _worker_driver = setup_driver()
+        logger.info("Browser session initialized")
+        # Pool workers skip atexit, so register the shutdown with multiprocessing instead
+        multiprocessing.util.Finalize(None, _quit_driver, args=(_worker_driver,), exitpriority=10)
+    return _worker_driver
+
+def reset_worker_driver():
+    """Close this process's browser so the next location starts from a fresh one"""
+    global _worker_driver
+    if _worker_driver is not None:
+        _quit_driver(_worker_driver)
+        _worker_driver = None
+
+def resume_key(lat, lng, category_pattern):
+    """Key identifying one (location, category) pair in the resume log"""
+    return f"{lat},{lng},{category_pattern}"
+
+def read_done_keys(done_path):
+    """Load the (location, category) pairs finished by earlier runs"""
+    if not os.path.exists(done_path):
+        return set()
+    with open(done_path, 'r', encoding='utf-8') as file:
+        return set(file.read().splitlines())
+
+def parse_locations(locations):
+    """
+    Convert location rows to (lat, lng) float tuples
+    
+    Rows with missing or non-numeric coordinates are dropped with a warning.
+    """
+    parsed = []
+    for location in locations:
+        try:
+            parsed.append((float(location.get("latitude", "").strip()), float(location.get("longitude", "").strip())))
+        except ValueError as e:
+            logger.warning("Skipping invalid coordinates in location %s: %s", location, e)
+    return parsed
+
+def scrape_location(location, categories, args, results, done_keys=frozenset(), start_at=0):
+    """
+    Scrape every category for a single location
+    
+    `location` is a (lat, lng) tuple from parse_locations() and `categories`
+    is the output of prepare_categories(). Runs inside a worker
+    process and reuses that process's Chrome driver across locations.
+    Categories whose resume key is in `done_keys` are skipped. The job
+    waits until the time.time() value `start_at` before touching the browser.
+    
+    Each category is put on the `results` queue as (lat, lng, products,
+    resume_key) as soon as it is scraped, so the parent process can write its
+    rows and record it as done while the rest of the job runs. A category that
+    fails is logged and skipped. Returns (lat, lng, scraped, failed) category counts.
+    """
+    lat, lng = location
+    
+    pending = [c for c in categories if resume_key(lat, lng, c[1]) not in done_keys]
+    if not pending:
+        logger.info("--- Skipping location %s, %s: all categories already scraped ---", lat, lng)
+        return lat, lng, 0, 0
+    
+    # Staggered start (--location_delay): wait here, in the worker, for this job's slot
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    
+    logger.info("--- Processing location: %s, %s (%d categories already scraped) ---", lat, lng, len(categories) - len(pending))
+    
+    driver = get_worker_driver()
+    processor = BlinkitProcessor(args.output_dir)
+    scraped = 0
+    failed = 0
+    
+    try:
+        # For the session start we need a URL to land on
+        initial_url = pending[0][0]
+        scraper = BlinkitAPIScraper(initial_url, lat=lat, lng=lng, output_dir=args.output_dir, driver=driver,
+                                    scroll_wait=args.scroll_wait, scroll_jitter=args.scroll_jitter)
+        # Navigate to the URL and set location. Without it the page shows Blinkit's default
+        # location, whose rows would be written (and marked done) under this lat/lng.
+        if not scraper.start_session():
+            raise RuntimeError(f"Could not set location to {lat}, {lng}")
+    except Exception:
+        # Don't hand a possibly broken browser to the next location
+        reset_worker_driver()
+        raise
+    
+    # Iterate through each category for this location
+    for cat_idx, (url, category_pattern, category_info) in enumerate(pending, 1):
+        logger.debug("[%s, %s] Category %d/%d: %s > %s", lat, lng, cat_idx, len(pending), category_info['l1_category'], category_info['l2_category'])
+        logger.debug("URL: %s", url)
+        
+        try:
+            # Navigate to new category URL (doesn't change location)
+            scraper.navigate_to_category(url)
+            
+            # Scrape data for this category
+            success, api_data = scraper.scrape_category(scroll_count=args.scroll)
+            
+            if not success or not api_data:
+                logger.warning("[%s, %s] Scraping failed or no data found for %s", lat, lng, url)
+                continue
+                
+            logger.debug("Scraped %d API responses for this category", len(api_data))
+            
+            # Extract right away so the raw responses are released before the next category
+            products = processor.process_api_data(api_data, category_info, lat, lng)
+        except Exception:
+            # One bad category (e.g. a page load timeout) shouldn't cost the categories around it
+            logger.exception("[%s, %s] Error scraping %s", lat, lng, url)
+            failed += 1
+            continue
+        
+        results.put((lat, lng, products, resume_key(lat, lng, category_pattern)))
+        scraped += 1
+    
+    if failed:
+        # Start the next job from a fresh browser in case the failures left this one broken
+        reset_worker_driver()
+    
+    return lat, lng, scraped, failed
+
+def write_results(results, output_file, done_file, mirror):
+    """
+    Write every category result waiting on the queue
+    
+    Rows are appended to the CSV (and mirrored to Parquet if `mirror` is set),
+    and the category's resume key is recorded only once its rows are on disk.
+    A failed Parquet write is logged and turns mirroring off; the CSV stays
+    authoritative and the analyzers fall back to it.
+    Returns (products written, mirror), with mirror None once it has failed.
+    """
+    written = 0
+    while True:
+        try:
+            lat, lng, products, key = results.get_nowait()
+        except queue.Empty:
+            return written, mirror
+        
+        if len(products):
+            products.to_csv(output_file, header=False, index=False, lineterminator='\r\n')
+            # Flush per category so a crash loses at most the categories in flight
+            output_file.flush()
+            if mirror is not None:
+                try:
+                    mirror(products)
+                except Exception:
+                    logger.exception("Could not mirror rows to Parquet; mirroring is off for the rest of this run")
+                    mirror = None
+            logger.debug("[%s, %s] Added %d products", lat, lng, len(products))
+            written += len(products)
+        
+        done_file.write(f"{key}\n")
+        done_file.flush()
+
 def main():
     parser = argparse.ArgumentParser(description="Blinkit Scraper and Processor")
     parser.add_argument("--input_dir", default="input", help="Directory containing input CSV files")
     parser.add_argument("--locations_file", default="blinkit_locations.csv", help="CSV file with location coordinates")
     parser.add_argument("--categories_file", default="blinkit_categories.csv", help="CSV file with categories to scrape")
-    parser.add_argument("--scroll", type=int, default=15, help="Number of scroll actions to perform")
+    parser.add_argument("--scroll", type=int, default=100, help="Maximum number of scroll actions (scrolling stops early on the last page)")
+    parser.add_argument("--scroll_wait", type=float, default=4.0, help="Longest wait in seconds for new results after each scroll (ends early once they load)")
+    parser.add_argument("--scroll_jitter", type=float, default=1.5, help="Up to this many random seconds added to --scroll_wait")
     parser.add_argument("--output_dir", default="blinkit_data", help="Directory to store the scraped data")
     parser.add_argument("--output_csv", default="blinkit_products.csv", help="Name of the CSV file to store all products")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1), help="Number of scrape jobs to run in parallel, each with its own browser")
+    parser.add_argument("--category_batches", type=int, default=1, help="Split each location's categories into this many jobs so one location can be scraped by several browsers at once")
+    parser.add_argument("--force", action="store_true", help="Re-scrape pairs already recorded in the resume log")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log per-category progress")
+    parser.add_argument("--location_delay", type=float, default=0, help="Seconds between the scheduled starts of consecutive scrape jobs")
     
     args = parser.parse_args()
     
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    configure_logging(log_level)
+    
     # Construct full paths
     locations_path = os.path.join(args.input_dir, args.locations_file)
     categories_path = os.path.join(args.input_dir, args.categories_file)
     output_csv_path = os.path.join(args.output_dir, args.output_csv)
+    # The resume log belongs to the CSV it records rows for
+    done_path = f"{output_csv_path}.done"
     
     # Read locations and categories from CSV files
-    locations = read_csv_file(locations_path)
-    categories = read_csv_file(categories_path)
+    locations = parse_locations(read_csv_file(locations_path))
+    categories = prepare_categories(read_csv_file(categories_path))
     
     if not locations:
-        print(f"No locations found in {locations_path}. Exiting.")
+        logger.error("No locations found in %s. Exiting.", locations_path)
         return
     
     if not categories:
-        print(f"No categories found in {categories_path}. Exiting.")
+        logger.error("No categories found in %s. Exiting.", categories_path)
         return
     
-    print(f"Loaded {len(locations)} locations and {len(categories)} categories")
+    logger.info("Loaded %d locations and %d categories", len(locations), len(categories))
     
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
-    # Initialize a single browser session outside the loop
-    driver = setup_driver()
-    print("Browser session initialized")
+    # The parent process is the only CSV writer: keep one append handle open for the whole run
+    file_exists = os.path.exists(output_csv_path)
     
-    # Initialize a single processor for all data
-    processor = BlinkitProcessor(args.output_dir)
+    # (location, category) pairs finished by earlier runs are skipped unless --force. A new
+    # CSV starts a fresh log: pairs recorded against a deleted CSV have no rows anywhere.
+    done_keys = set() if args.force or not file_exists else read_done_keys(done_path)
+    if done_keys:
+        logger.info("Resuming: %d location/category pairs already scraped", len(done_keys))
     
-    # Create or prepare the output CSV file with headers
     all_products_found = 0
     
-    try:
-        # Iterate through each location
-        current_lat = None
-        current_lng = None
+    # Mirror rows to the Parquet dataset the analyzers read, when pyarrow is available
+    output_processor = BlinkitProcessor(args.output_dir)
+    mirror_parquet = output_processor.should_mirror_parquet(output_csv_path, file_exists)
+    # Workers hand back each finished category through a managed queue
+    with open(output_csv_path, 'a', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as output_file, \
+            open(done_path, 'a' if file_exists else 'w', encoding='utf-8') as done_file, \
+            multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=max(1, args.processes), initializer=configure_logging, initargs=(log_level,)) as executor:
+        results = manager.Queue()
+        if not file_exists:
+            csv.writer(output_file).writerow(CSV_FIELDNAMES)
+            output_file.flush()
         
-        for location_idx, location in enumerate(locations, 1):
-            try:
-                lat = float(location.get("latitude", "").strip())
-                lng = float(location.get("longitude", "").strip())
-                
-                print(f"\n--- Processing location {location_idx}/{len(locations)}: {lat}, {lng} ---")
-                location_changed = (current_lat != lat or current_lng != lng)
-                
-                # Initialize the scraper only once, with the browser session
-                if location_idx == 1:
-                    # For first location, we need a URL to start with
-                    initial_category = categories[0]
-                    initial_url = build_category_url(
-                        initial_category.get("l1_category", "").strip(),
-                        initial_category.get("l1_category_id", "").strip(),
-                        initial_category.get("l2_category", "").strip(),
-                        initial_category.get("l2_category_id", "").strip()
-                    )
-                    scraper = BlinkitAPIScraper(initial_url, lat=lat, lng=lng, output_dir=args.output_dir, driver=driver)
-                    # Navigate to the URL and set location
-                    scraper.start_session()
-                    location_changed = True
-                elif location_changed:
-                    # Update the scraper with new location
-                    scraper.update_location(lat, lng)
-                
-                current_lat = lat
-                current_lng = lng
-                
-                # Iterate through each category for this location
-                for cat_idx, category in enumerate(categories, 1):
-                    l1_category = category.get("l1_category", "").strip()
-                    l1_category_id = category.get("l1_category_id", "").strip()
-                    l2_category = category.get("l2_category", "").strip()
-                    l2_category_id = category.get("l2_category_id", "").strip()
-                    
-                    if not all([l1_category, l1_category_id, l2_category, l2_category_id]):
-                        print(f"Skipping incomplete category entry: {category}")
-                        continue
-                    
-                    # Build the URL for this category
-                    url = build_category_url(l1_category, l1_category_id, l2_category, l2_category_id)
-                    category_pattern = f"{l1_category.lower().replace(' ', '_')}_{l2_category.lower().replace(' ', '_')}_{l1_category_id}_{l2_category_id}"
-                    
-                    print(f"\nCategory {cat_idx}/{len(categories)}: {l1_category} > {l2_category}")
-                    print(f"URL: {url}")
-                    
-                    # Navigate to new category URL (doesn't change location)
-                    scraper.navigate_to_category(url)
-                    
-                    # Scrape data for this category
-                    success, api_data = scraper.scrape_category(scroll_count=args.scroll)
-                    
-                    if not success or not api_data:
-                        print("Scraping failed or no data found. Check the logs for details.")
-                        continue
-                        
-                    print(f"Scraped {len(api_data)} API responses for this category")
-                    
-                    # Process the data and update the CSV
-                    category_info = {
-                        'l1_category': l1_category,
-                        'l1_category_id': l1_category_id,
-                        'l2_category': l2_category,
-                        'l2_category_id': l2_category_id
-                    }
-                    
-                    products = processor.process_api_data(api_data, category_info, lat, lng)
-                    all_products_found += len(products)
-                    
-                    if products:
-                        processor.update_csv(products, output_csv_path)
-                        print(f"Added {len(products)} products to {output_csv_path}")
-                    else:
-                        print("No products found for this category")
-                
-                # Optional: Add a delay between locations
-                if location_idx < len(locations):
-                    print("Waiting 5 seconds before moving to the next location...")
-                    time.sleep(5)
-                    
-            except ValueError as e:
-                print(f"Invalid coordinates in location {location}: {str(e)}")
-                continue
-            except Exception as e:
-                print(f"Error processing location {location}: {str(e)}")
-                import traceback
-                print(traceback.format_exc())
-                continue
+        # A job is one location plus a slice of its categories. Each worker process runs
+        # one job at a time, reusing its browser session across jobs.
+        batch_count = max(1, min(args.category_batches, len(categories)))
+        category_batches = [categories[i::batch_count] for i in range(batch_count)]
         
-        print(f"\nScraping completed! Total products found: {all_products_found}")
-        print(f"All data has been saved to: {output_csv_path}")
+        # Optionally stagger session starts so Blinkit doesn't see a burst of new browsers:
+        # job i starts no earlier than i * --location_delay seconds from now. The workers do
+        # the waiting, so every job is submitted at once and results are written meanwhile.
+        # Jobs with nothing left to scrape aren't submitted, so they don't take up a slot.
+        run_start = time.time()
+        futures = {}
+        skipped = 0
+        for location in locations:
+            for batch in category_batches:
+                if all(resume_key(location[0], location[1], c[1]) in done_keys for c in batch):
+                    skipped += 1
+                    continue
+                start_at = run_start + len(futures) * max(0, args.location_delay)
+                futures[executor.submit(scrape_location, location, batch, args, results, done_keys, start_at)] = location
         
-    finally:
-        # Ensure the browser is closed when done
-        try:
-            driver.quit()
-            print("Browser session closed")
-        except:
-            pass
+        if skipped:
+            logger.info("Skipping %d jobs whose categories were all scraped by earlier runs", skipped)
+        
+        # Write categories as they arrive, including those of jobs still running
+        mirror = output_processor.update_parquet if mirror_parquet else None
+        not_done = set(futures)
+        finished = 0
+        while not_done:
+            done, not_done = wait(not_done, timeout=1, return_when=FIRST_COMPLETED)
+            # A job's results are all queued before its future completes
+            written, mirror = write_results(results, output_file, done_file, mirror)
+            all_products_found += written
+            
+            for future in done:
+                finished += 1
+                location = futures[future]
+                try:
+                    lat, lng, scraped, failed = future.result()
+                except Exception:
+                    logger.exception("Error processing location %s", location)
+                    continue
+                
+                logger.info("--- Finished job %d/%d: %s, %s (%d categories scraped, %d failed) ---",
+                            finished, len(futures), lat, lng, scraped, failed)
+        
+        # update_parquet buffers rows; write out what is left once every job is done
+        if mirror is not None:
+            try:
+                output_processor.flush_parquet()
+            except Exception:
+                logger.exception("Could not mirror rows to Parquet")
+
+    logger.info("Scraping completed! Total products found: %d", all_products_found)
+    logger.info("All data has been saved to: %s", output_csv_path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,103 +1,205 @@
 import os
-import csv
 import json
+import logging
+import shutil
+import numpy as np
 import pandas as pd
-from datetime import datetime
+import time
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+# 1 MiB write buffer so appended rows reach disk in large sequential writes
+CSV_BUFFER_SIZE = 1 << 20
+
+# Column order of the products CSV
+CSV_FIELDNAMES = [
+    'date', 'lat', 'lng', 'l1_category', 'l1_category_id', 'l2_category', 'l2_category_id',
+    'store_id', 'variant_id', 'variant_name', 'group_id', 'selling_price',
+    'mrp', 'in_stock', 'inventory', 'is_offer', 'image_url', 'brand_id', 'brand'
+]
+
+# dtypes for reading the products CSV back. lat/lng stay float64 so nearby
+# coordinates don't collapse into one location at float32 precision; the
+# low-cardinality text columns are categoricals. Prices are read as text and
+# converted by _numeric_prices: older files hold values like "1,299" or
+# non-numeric text, and one such cell would fail a strict float read.
+CSV_DTYPES = {
+    'lat': 'float64', 'lng': 'float64', 'selling_price': 'str', 'mrp': 'str',
+    'is_offer': 'category', 'in_stock': 'category', 'l1_category': 'category', 'l2_category': 'category'
+}
+
+# Price columns and the dtype they are analyzed (and stored in Parquet) as
+PRICE_COLUMNS = ('selling_price', 'mrp')
+PRICE_DTYPE = 'float32'
+
+# Rows per chunk when streaming the products CSV
+CSV_CHUNK_ROWS = 200_000
+
+# Rows of mirrored products buffered before they are written to the Parquet dataset,
+# so each write adds a few large files instead of one small file per category
+PARQUET_FLUSH_ROWS = 100_000
+
+# Parquet copy of the products CSV (partitioned by date).
+# The analyzers read it instead of re-parsing the CSV when pyarrow is installed.
+PARQUET_DATASET = "blinkit_products_parquet"
+
+# File in the dataset holding the CSV's size in bytes after the last mirrored append.
+# The dataset is only trusted while this matches the CSV. Parquet readers skip
+# files starting with '_'.
+PARQUET_MARKER = "_csv_size"
+
+# Deletes the rupee sign, whitespace and thousands separators from snippet price text in one pass
+_PRICE_STRIP = str.maketrans('', '', '₹ \t\n,')
+
+# Shared default for nested .get() lookups so a missing key doesn't allocate a new dict; never mutated
+_EMPTY = {}
+
+# Product attributes that identify a duplicate row. The location is part of the key:
+# the same product at another location is a separate row, which is what the
+# per-location summaries and the price variation analysis compare.
+# _extract_products builds the dedup key tuple inline in this order.
+HASH_FIELDS = (
+    'lat', 'lng', 'l1_category', 'l2_category', 'variant_id', 'variant_name',
+    'group_id', 'selling_price', 'mrp', 'brand'
+)
 
 class BlinkitProcessor:
     def __init__(self, output_dir="blinkit_data"):
         """Initialize the processor with output directory"""
         self.output_dir = output_dir
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
         
         # Track unique products to avoid duplicates
-        self.unique_products = {}
-    
-    def generate_product_hash(self, product):
-        """Generate a unique hash for a product based on key attributes"""
-        unique_attrs = (
-            f"{product.get('l1_category', '')}"
-            f"{product.get('l2_category', '')}"
-            f"{product.get('variant_id', '')}"
-            f"{product.get('variant_name', '')}"
-            f"{product.get('group_id', '')}"
-            f"{product.get('selling_price', '')}"
-            f"{product.get('mrp', '')}"
-            f"{product.get('brand', '')}"
-        )
+        self.unique_products = set()
         
-        import hashlib
-        return hashlib.md5(unique_attrs.encode('utf-8')).hexdigest()
+        # Products waiting for flush_parquet, and their total row count
+        self._parquet_buffer = []
+        self._parquet_buffered_rows = 0
     
     def process_api_data(self, api_data, category_info, lat, lng):
         """
         Process API response data and extract product details
         
         Args:
-            api_data: List of API response JSON data
+            api_data: List of API responses, either parsed JSON or raw str/bytes bodies
             category_info: Dictionary containing category details
             lat: Latitude for this data
             lng: Longitude for this data
             
         Returns:
-            List of extracted product dictionaries
+            DataFrame of extracted products with CSV_FIELDNAMES columns
+        """
+        columns = [[] for _ in CSV_FIELDNAMES]
+        date_str = time.strftime('%Y-%m-%d')
+        
+        self._extract_products(api_data, category_info, lat, lng, columns)
+        
+        products = self._build_frame(columns, date_str)
+        logger.debug("Processed %d unique products from API data", len(products))
+        return products
+    
+    def _build_frame(self, columns, date_str):
         """
-        products = []
-        date_str = datetime.now().strftime('%Y-%m-%d')
+        Turn column lists in CSV_FIELDNAMES order into a DataFrame
         
+        The date column list is left empty by _extract_products; every row gets
+        date_str, stored as a single-category Categorical rather than N strings.
+        The is_offer column arrives holding each product's explicit offer flag;
+        it is combined here with a single MRP > selling price comparison over the
+        whole frame. Prices that don't parse as numbers never count as an offer.
+        """
+        data = dict(zip(CSV_FIELDNAMES, columns))
+        data['date'] = pd.Categorical.from_codes(np.zeros(len(columns[-1]), dtype=np.int8), categories=[date_str])
+        products = pd.DataFrame(data, columns=CSV_FIELDNAMES)
+        selling_price = pd.to_numeric(products['selling_price'], errors='coerce')
+        mrp = pd.to_numeric(products['mrp'], errors='coerce')
+        discounted = (mrp > selling_price) & (selling_price != 0)
+        has_offer = products['is_offer'].astype(bool) | discounted
+        products['is_offer'] = np.where(has_offer, 'Yes', 'No')
+        return products
+    
+    def _extract_products(self, api_data, category_info, lat, lng, columns):
+        """
+        Append the unique products found in api_data to the column lists
+        
+        Products are stored column-wise (one list per CSV_FIELDNAMES entry)
+        rather than as a dict per product. The date column is filled by _build_frame.
+        """
         l1_category = category_info.get('l1_category', '')
         l1_category_id = category_info.get('l1_category_id', '')
         l2_category = category_info.get('l2_category', '')
         l2_category_id = category_info.get('l2_category_id', '')
         
+        # The leading CSV columns after date are identical for every product in this call, so
+        # they are filled once at the end; the loop only appends the per-product columns
+        shared_values = (lat, lng, l1_category, l1_category_id, l2_category, l2_category_id)
+        shared_columns = columns[1:len(shared_values) + 1]
+        product_columns = columns[len(shared_values) + 1:]
+        added = 0
+        
         # Process each API response
         for response_data in api_data:
+            # Raw bodies are decoded here so callers can skip their own parse
+            if isinstance(response_data, (bytes, str)):
+                response_data = _json_loads(response_data)
+            
             # Parse products from widgets structure
             if "widgets" in response_data:
                 for widget in response_data["widgets"]:
                     if "products" in widget:
                         for product in widget["products"]:
-                            # Extract product details
-                            selling_price = product.get("price", {}).get("selling_price", "")
-                            mrp = product.get("price", {}).get("mrp", "")
+                            # Extract the identifying fields first and skip duplicates before building the row
+                            price = product.get("price", _EMPTY)
+                            selling_price = price.get("selling_price", "")
+                            mrp = price.get("mrp", "")
+                            variant_id = product.get("id", "")
+                            variant_name = f"{product.get('name', '')} {product.get('variant', '')}".strip()
+                            group_id = product.get("group_id", "")
+                            brand = product.get("brand", "")
                             
-                            # Create product data
-                            product_data = {
-                                'date': date_str,
-                                'lat': lat,
-                                'lng': lng,
-                                'l1_category': l1_category,
-                                'l1_category_id': l1_category_id,
-                                'l2_category': l2_category,
-                                'l2_category_id': l2_category_id,
-                                'store_id': product.get("store_id", ""),
-                                'variant_id': product.get("id", ""),
-                                'variant_name': f"{product.get('name', '')} {product.get('variant', '')}".strip(),
-                                'group_id': product.get("group_id", ""),
-                                'selling_price': selling_price,
-                                'mrp': mrp,
-                                'in_stock': 'Yes' if product.get("is_in_stock", False) else 'No',
-                                'inventory': product.get("inventory", 0),
-                                'image_url': product.get("image_url", ""),
-                                'brand_id': product.get("brand_id", ""),
-                                'brand': product.get("brand", "")
-                            }
+                            key = (
+                                lat, lng, l1_category, l2_category, variant_id, variant_name,
+                                group_id, selling_price, mrp, brand
+                            )
+                            if key in self.unique_products:
+                                continue
                             
-                            # Check for offer
-                            has_offer = False
-                            if product.get("is_offer", False):
-                                has_offer = True
-                            elif mrp and selling_price and float(mrp) > float(selling_price):
-                                has_offer = True
+                            # Explicit offer flag; the MRP/selling price comparison is done per frame
+                            has_offer = bool(product.get("is_offer", False))
                             
-                            product_data['is_offer'] = 'Yes' if has_offer else 'No'
+                            # Per-product values in CSV_FIELDNAMES order
+                            row = (
+                                product.get("store_id", ""),
+                                variant_id,
+                                variant_name,
+                                group_id,
+                                selling_price,
+                                mrp,
+                                'Yes' if product.get("is_in_stock", False) else 'No',
+                                product.get("inventory", 0),
+                                has_offer,
+                                product.get("image_url", ""),
+                                product.get("brand_id", ""),
+                                brand
+                            )
                             
-                            # Generate hash and check for duplicates
-                            product_hash = self.generate_product_hash(product_data)
-                            if product_hash not in self.unique_products:
-                                self.unique_products[product_hash] = True
-                                products.append(product_data)
+                            self.unique_products.add(key)
+                            for column, value in zip(product_columns, row):
+                                column.append(value)
+                            added += 1
             
             # Alternative structure (check for snippets format)
             elif 'response' in response_data and 'snippets' in response_data['response']:
@@ -106,163 +208,327 @@ class BlinkitProcessor:
                         product_data = snippet['data']
                         
                         # Combine variant and name for variant_name
-                        variant_text = product_data.get('variant', {}).get('text', '')
-                        name_text = product_data.get('name', {}).get('text', '')
+                        variant_text = product_data.get('variant', _EMPTY).get('text', '')
+                        name_text = product_data.get('name', _EMPTY).get('text', '')
                         variant_name = f"{name_text} {variant_text}".strip()
                         
                         # Handle price extraction
-                        selling_price = product_data.get('normal_price', {}).get('text', '')
-                        selling_price = selling_price.replace('₹', '').strip() if selling_price else ''
+                        selling_price = product_data.get('normal_price', _EMPTY).get('text', '')
+                        selling_price = selling_price.translate(_PRICE_STRIP) if selling_price else ''
                         
                         # Handle MRP 
-                        mrp = product_data.get('mrp', {}).get('text', '')
+                        mrp = product_data.get('mrp', _EMPTY).get('text', '')
                         if not mrp:
                             mrp = selling_price
                         else:
-                            mrp = mrp.replace('₹', '').strip()
+                            mrp = mrp.translate(_PRICE_STRIP)
+                        
+                        variant_id = product_data.get('product_id', '')
+                        group_id = product_data.get('group_id', '')
+                        brand = product_data.get('brand_name', _EMPTY).get('text', '')
+                        
+                        # Skip duplicates before working out offers and building the row
+                        key = (
+                            lat, lng, l1_category, l2_category, variant_id, variant_name,
+                            group_id, selling_price, mrp, brand
+                        )
+                        if key in self.unique_products:
+                            continue
                         
-                        # Determine if product has an offer
-                        has_offer = False
-                        if product_data.get('offer_tag') is not None:
-                            has_offer = True
-                        elif mrp and selling_price and float(mrp) > float(selling_price):
-                            has_offer = True
-                        elif product_data.get('offer') is not None and product_data.get('offer') is not False:
-                            if product_data.get('offer') or mrp != selling_price:
-                                has_offer = True
+                        # Explicit offer markers; the MRP/selling price comparison is done per frame
+                        offer = product_data.get('offer')
+                        has_offer = (
+                            product_data.get('offer_tag') is not None
+                            or (offer is not None and offer is not False and bool(offer or mrp != selling_price))
+                        )
                         
-                        product = {
-                            'date': date_str,
-                            'lat': lat,
-                            'lng': lng,
-                            'l1_category': l1_category,
-                            'l1_category_id': l1_category_id,
-                            'l2_category': l2_category,
-                            'l2_category_id': l2_category_id,
-                            'store_id': product_data.get('merchant_id', ''),
-                            'variant_id': product_data.get('product_id', ''),
-                            'variant_name': variant_name,
-                            'group_id': product_data.get('group_id', ''),
-                            'selling_price': selling_price,
-                            'mrp': mrp,
-                            'in_stock': 'Yes' if not product_data.get('is_sold_out', True) else 'No',
-                            'inventory': product_data.get('inventory', 0),
-                            'is_offer': 'Yes' if has_offer else 'No',
-                            'image_url': product_data.get('image', {}).get('url', ''),
-                            'brand_id': '',
-                            'brand': product_data.get('brand_name', {}).get('text', '')
-                        }
+                        # Per-product values in CSV_FIELDNAMES order
+                        row = (
+                            product_data.get('merchant_id', ''),
+                            variant_id,
+                            variant_name,
+                            group_id,
+                            selling_price,
+                            mrp,
+                            'Yes' if not product_data.get('is_sold_out', True) else 'No',
+                            product_data.get('inventory', 0),
+                            has_offer,
+                            product_data.get('image', _EMPTY).get('url', ''),
+                            '',
+                            brand
+                        )
                         
-                        # Generate hash and check for duplicates
-                        product_hash = self.generate_product_hash(product)
-                        if product_hash not in self.unique_products:
-                            self.unique_products[product_hash] = True
-                            products.append(product)
+                        self.unique_products.add(key)
+                        for column, value in zip(product_columns, row):
+                            column.append(value)
+                        added += 1
         
-        print(f"Processed {len(products)} unique products from API data")
-        return products
+        for column, value in zip(shared_columns, shared_values):
+            column.extend([value] * added)
     
     def update_csv(self, products, output_csv_path):
         """
         Update the CSV file with new product data
         
         Args:
-            products: List of product dictionaries to add
+            products: DataFrame from process_api_data (a list of product dictionaries also works)
             output_csv_path: Path to the CSV file
         """
-        fieldnames = [
-            'date', 'lat', 'lng', 'l1_category', 'l1_category_id', 'l2_category', 'l2_category_id',
-            'store_id', 'variant_id', 'variant_name', 'group_id', 'selling_price',
-            'mrp', 'in_stock', 'inventory', 'is_offer', 'image_url', 'brand_id', 'brand'
-        ]
+        if not isinstance(products, pd.DataFrame):
+            products = pd.DataFrame(products, columns=CSV_FIELDNAMES)
         
         # Create file with headers if it doesn't exist
         file_exists = os.path.exists(output_csv_path)
+        mirror_parquet = self.should_mirror_parquet(output_csv_path, file_exists)
         
-        with open(output_csv_path, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            
-            # Write header only if the file doesn't exist yet
-            if not file_exists:
-                writer.writeheader()
-            
-            # Write all product rows
-            for product in products:
-                writer.writerow(product)
+        with open(output_csv_path, 'a', newline='', encoding='utf-8', buffering=CSV_BUFFER_SIZE) as output_file:
+            # \r\n rows match what csv.DictWriter wrote before
+            products.to_csv(output_file, header=not file_exists, index=False, lineterminator='\r\n')
+        
+        if mirror_parquet:
+            self.update_parquet(products)
+            self.flush_parquet()
+    
+    def should_mirror_parquet(self, output_csv_path, csv_existed):
+        """
+        Whether rows appended to output_csv_path should also go to the Parquet dataset
+        
+        Only the default products CSV is mirrored, and only while the dataset holds
+        all of it. A dataset that fell behind (a run without pyarrow, a failed
+        write) or a CSV that predates the dataset is never mirrored into, so the
+        analyzers can't read a partial copy. When the CSV is about to be created,
+        any leftover dataset is removed and mirroring starts afresh.
+        """
+        if pq is None:
+            return False
+        if os.path.abspath(output_csv_path) != os.path.abspath(self._default_csv()):
+            return False
+        if not csv_existed:
+            shutil.rmtree(self._parquet_path(), ignore_errors=True)
+            return True
+        return self._parquet_in_sync()
+    
+    def update_parquet(self, products):
+        """
+        Queue products for the Parquet dataset, writing them out once PARQUET_FLUSH_ROWS have built up
+        
+        The rows must already be flushed to the default CSV. Until flush_parquet
+        writes them the marker stays stale, so the analyzers read the CSV.
+        """
+        self._parquet_buffer.append(products)
+        self._parquet_buffered_rows += len(products)
+        if self._parquet_buffered_rows >= PARQUET_FLUSH_ROWS:
+            self.flush_parquet()
+    
+    def flush_parquet(self):
+        """
+        Append the queued products to the Parquet dataset as new files under their date partition
+        
+        Prices and coordinates are stored as numbers so the analyzers don't parse
+        them again; every other column is stored as text, as it reads from the CSV.
+        The default CSV's size is recorded afterwards as the dataset's sync marker.
+        """
+        if not self._parquet_buffer:
+            return
+        frame = pd.concat(self._parquet_buffer, ignore_index=True)
+        self._parquet_buffer = []
+        self._parquet_buffered_rows = 0
+        
+        frame = self._numeric_prices(frame)
+        for column in CSV_FIELDNAMES:
+            if column in ('lat', 'lng'):
+                frame[column] = pd.to_numeric(frame[column], errors='coerce').astype(CSV_DTYPES[column])
+            elif column not in PRICE_COLUMNS:
+                frame[column] = frame[column].astype(object).fillna('').astype(str)
+        
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        pq.write_to_dataset(table, root_path=self._parquet_path(), partition_cols=['date'])
+        
+        # Written only after the data files, so a failed write leaves the marker stale
+        marker_path = os.path.join(self._parquet_path(), PARQUET_MARKER)
+        with open(marker_path + ".tmp", 'w', encoding='utf-8') as marker:
+            marker.write(str(os.path.getsize(self._default_csv())))
+        os.replace(marker_path + ".tmp", marker_path)
+    
+    def _parquet_in_sync(self):
+        """Whether the Parquet dataset's marker matches the default CSV's current size"""
+        try:
+            with open(os.path.join(self._parquet_path(), PARQUET_MARKER), 'r', encoding='utf-8') as marker:
+                return int(marker.read()) == os.path.getsize(self._default_csv())
+        except (OSError, ValueError):
+            return False
+    
+    def _default_csv(self):
+        """Path of the products CSV the analyzers read by default"""
+        return f"{self.output_dir}/blinkit_products.csv"
+    
+    def _parquet_path(self):
+        """Path of the Parquet copy of the default products CSV"""
+        return os.path.join(self.output_dir, PARQUET_DATASET)
+    
+    def _use_parquet(self, input_csv):
+        """Analyzers read the Parquet dataset when given no input_csv and it holds all of the default CSV"""
+        return pq is not None and input_csv is None and self._parquet_in_sync()
+    
+    def _read_parquet(self, columns):
+        """Read columns from the Parquet dataset with the same dtypes as the CSV readers"""
+        return self._parquet_dtypes(pd.read_parquet(self._parquet_path(), columns=columns), columns)
+    
+    def _iter_parquet(self, columns):
+        """Stream columns from the Parquet dataset in batches of up to CSV_CHUNK_ROWS, like the chunked CSV readers"""
+        dataset = ds.dataset(self._parquet_path(), format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=columns, batch_size=CSV_CHUNK_ROWS):
+            yield self._parquet_dtypes(batch.to_pandas(), columns)
+    
+    def _parquet_dtypes(self, df, columns):
+        """Apply the CSV readers' dtypes to a frame read from Parquet"""
+        # Prices are already stored as numbers; _numeric_prices leaves them as they are
+        return df.astype({column: CSV_DTYPES[column] for column in columns
+                          if column in CSV_DTYPES and column not in PRICE_COLUMNS})
+    
+    def _numeric_prices(self, df):
+        """
+        Convert the price columns in df to PRICE_DTYPE
+        
+        Text prices lose rupee signs, whitespace and thousands separators first,
+        so "1,299" from older files reads as 1299. Values that still aren't
+        numbers become NaN instead of failing the read.
+        """
+        for column in PRICE_COLUMNS:
+            if column in df:
+                values = df[column]
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = values.astype(str).str.translate(_PRICE_STRIP)
+                df[column] = pd.to_numeric(values, errors='coerce').astype(PRICE_DTYPE)
+        return df
     
     def process_csv(self, input_csv=None):
         """
         Process the CSV file with all products
-        If input_csv is None, uses the default blinkit_products.csv
+        If input_csv is None, uses the default blinkit_products.csv (or its Parquet copy, while that is in sync)
         """
+        use_parquet = self._use_parquet(input_csv)
         if input_csv is None:
-            input_csv = f"{self.output_dir}/blinkit_products.csv"
+            input_csv = self._default_csv()
         
-        if not os.path.exists(input_csv):
-            print(f"CSV file not found: {input_csv}")
+        if not use_parquet and not os.path.exists(input_csv):
+            logger.error("CSV file not found: %s", input_csv)
             return None
         
         try:
-            # Load the CSV into pandas DataFrame
-            df = pd.read_csv(input_csv)
+            # Stream the CSV in chunks, reducing each one so memory tracks distinct products, not file size
+            records_processed = 0
+            key_parts = []
+            offer_parts = []
+            if use_parquet:
+                input_csv = self._parquet_path()
+                chunks = self._iter_parquet(['lat', 'lng', 'variant_id', 'is_offer'])
+            else:
+                chunks = pd.read_csv(
+                    input_csv,
+                    usecols=['lat', 'lng', 'variant_id', 'is_offer'],
+                    # variant_id as str so chunks with mixed id formats still dedup against each other
+                    dtype={**CSV_DTYPES, 'variant_id': 'str'},
+                    chunksize=CSV_CHUNK_ROWS
+                )
+            for chunk in chunks:
+                records_processed += len(chunk)
+                keys, offers = self._summary_parts(chunk)
+                key_parts.append(keys)
+                offer_parts.append(offers)
             
-            print(f"Loaded {len(df)} product records from {input_csv}")
+            logger.info("Loaded %d product records from %s", records_processed, input_csv)
             
             # Generate summary statistics
-            summary = self.generate_summary(df)
+            summary = self._combine_summary(key_parts, offer_parts)
             
             # Save summary to CSV
             summary_file = f"{self.output_dir}/blinkit_summary.csv"
             summary.to_csv(summary_file, index=False)
-            print(f"Saved summary to {summary_file}")
+            logger.info("Saved summary to %s", summary_file)
             
             return {
-                'records_processed': len(df),
+                'records_processed': records_processed,
                 'summary_file': summary_file
             }
             
         except Exception as e:
-            print(f"Error processing CSV file: {str(e)}")
+            logger.error("Error processing CSV file: %s", e)
             return None
     
     def generate_summary(self, df):
         """
         Generate summary statistics for the scraped data
         """
-        # Group by location (lat, lng) and category
-        location_summary = df.groupby(['lat', 'lng']).agg({
-            'variant_id': 'nunique',
-            'is_offer': lambda x: (x == 'Yes').sum()
-        }).reset_index()
+        keys, offers = self._summary_parts(df)
+        return self._combine_summary([keys], [offers])
+    
+    def _summary_parts(self, df):
+        """Reduce a frame to its distinct (lat, lng, variant_id) rows and per-location offer counts"""
+        keys = df[['lat', 'lng', 'variant_id']].drop_duplicates()
+        offers = (df['is_offer'] == 'Yes').groupby([df['lat'], df['lng']]).sum()
+        return keys, offers
+    
+    def _combine_summary(self, key_parts, offer_parts):
+        """Merge partial results from _summary_parts into the per-location summary"""
+        # Group by location (lat, lng)
+        keys = pd.concat(key_parts).drop_duplicates()
+        unique_products = keys.groupby(['lat', 'lng'])['variant_id'].nunique()
+        products_with_offers = pd.concat(offer_parts).groupby(level=[0, 1]).sum()
         
+        location_summary = pd.concat([unique_products, products_with_offers], axis=1).reset_index()
         location_summary.columns = ['latitude', 'longitude', 'unique_products', 'products_with_offers']
         
         # Calculate percentage of products with offers
-        location_summary['offer_percentage'] = (location_summary['products_with_offers'] / location_summary['unique_products'] * 100).round(2)
+        location_summary['offer_percentage'] = self._offer_percentage(location_summary['products_with_offers'], location_summary['unique_products'])
         
         return location_summary
     
+    def _offer_percentage(self, offers, totals):
+        """Percentage of offers out of totals as float32, rounded to 2 places; 0 where the total is 0"""
+        offers = offers.to_numpy(np.float32)
+        totals = totals.to_numpy(np.float32)
+        percentage = np.zeros_like(offers)
+        np.divide(offers, totals, out=percentage, where=totals > 0)
+        return np.round(percentage * 100, 2)
+    
     def analyze_price_variations(self, input_csv=None):
         """
         Analyze price variations for the same product across different locations
         """
+        use_parquet = self._use_parquet(input_csv)
         if input_csv is None:
-            input_csv = f"{self.output_dir}/blinkit_products.csv"
+            input_csv = self._default_csv()
         
-        if not os.path.exists(input_csv):
-            print(f"CSV file not found: {input_csv}")
+        if not use_parquet and not os.path.exists(input_csv):
+            logger.error("CSV file not found: %s", input_csv)
             return None
         
         try:
-            # Load the CSV into pandas DataFrame
-            df = pd.read_csv(input_csv)
+            # Load only the columns this analysis needs, with compact numeric dtypes
+            # Stream in chunks like process_csv, keeping only distinct per-variant prices and locations
+            columns = ['variant_id', 'variant_name', 'selling_price', 'lat']
+            if use_parquet:
+                chunks = self._iter_parquet(columns)
+            else:
+                chunks = pd.read_csv(
+                    input_csv,
+                    usecols=columns,
+                    # variant_id as str so chunks with mixed id formats still group together
+                    dtype={**CSV_DTYPES, 'variant_id': 'str'},
+                    chunksize=CSV_CHUNK_ROWS
+                )
+            price_parts = []
+            location_parts = []
+            name_parts = []
+            for chunk in chunks:
+                prices, locations, names = self._price_variation_parts(self._numeric_prices(chunk))
+                price_parts.append(prices)
+                location_parts.append(locations)
+                name_parts.append(names)
             
             # Group by product ID and check for price variations
-            price_variations = df.groupby('variant_id').agg({
-                'variant_name': 'first',
-                'selling_price': lambda x: x.nunique(),
-                'lat': 'nunique'
-            }).reset_index()
+            price_variations = self._combine_price_variations(price_parts, location_parts, name_parts)
             
             # Filter to only products with price variations and multiple locations
             price_variations = price_variations[
@@ -270,54 +536,78 @@ class BlinkitProcessor:
                 (price_variations['lat'] > 1)
             ]
             
-            # Sort by number of price variations
-            price_variations = price_variations.sort_values('selling_price', ascending=False)
+            # Sort by number of price variations (stable, so ties stay in variant_id order)
+            price_variations = price_variations.sort_values('selling_price', ascending=False, kind='stable')
             
             # Save to CSV
             if len(price_variations) > 0:
                 variations_file = f"{self.output_dir}/price_variations.csv"
                 price_variations.to_csv(variations_file, index=False)
-                print(f"Saved price variations to {variations_file}")
+                logger.info("Saved price variations to %s", variations_file)
                 return variations_file
             else:
-                print("No price variations found across locations")
+                logger.info("No price variations found across locations")
                 return None
             
         except Exception as e:
-            print(f"Error analyzing price variations: {str(e)}")
+            logger.error("Error analyzing price variations: %s", e)
             return None
     
+    def _price_variation_parts(self, df):
+        """Reduce a frame to its distinct (variant_id, selling_price) and (variant_id, lat) rows and first name per variant"""
+        prices = df[['variant_id', 'selling_price']].drop_duplicates()
+        locations = df[['variant_id', 'lat']].drop_duplicates()
+        names = df.groupby('variant_id')['variant_name'].first()
+        return prices, locations, names
+    
+    def _combine_price_variations(self, price_parts, location_parts, name_parts):
+        """Merge partial results from _price_variation_parts into per-variant price and location counts"""
+        names = pd.concat(name_parts).groupby(level=0).first()
+        price_counts = pd.concat(price_parts).groupby('variant_id')['selling_price'].nunique()
+        location_counts = pd.concat(location_parts).groupby('variant_id')['lat'].nunique()
+        
+        price_variations = pd.concat([names, price_counts, location_counts], axis=1)
+        return price_variations.rename_axis('variant_id').reset_index()
+    
     def analyze_offer_patterns(self, input_csv=None):
         """
         Analyze offer patterns across locations
         """
+        use_parquet = self._use_parquet(input_csv)
         if input_csv is None:
-            input_csv = f"{self.output_dir}/blinkit_products.csv"
+            input_csv = self._default_csv()
         
-        if not os.path.exists(input_csv):
-            print(f"CSV file not found: {input_csv}")
+        if not use_parquet and not os.path.exists(input_csv):
+            logger.error("CSV file not found: %s", input_csv)
             return None
         
         try:
-            # Load the CSV into pandas DataFrame
-            df = pd.read_csv(input_csv)
+            # Load only the columns this analysis needs
+            columns = ['l1_category', 'l2_category', 'lat', 'lng', 'variant_id', 'is_offer']
+            if use_parquet:
+                df = self._read_parquet(columns)
+            else:
+                df = pd.read_csv(input_csv, usecols=columns, dtype=CSV_DTYPES)
+            
+            # Compare once up front so the groupby can use the built-in sum instead of a per-group lambda;
+            # on a categorical column this compares integer codes, not strings
+            df['is_offer_bool'] = df['is_offer'] == 'Yes'
             
-            # Group by category and location
-            offer_patterns = df.groupby(['l1_category', 'l2_category', 'lat', 'lng']).agg({
-                'variant_id': 'count',
-                'is_offer': lambda x: (x == 'Yes').sum()
-            }).reset_index()
+            # Group by category and location (observed only, not every category combination)
+            offer_patterns = df.groupby(['l1_category', 'l2_category', 'lat', 'lng'], observed=True).agg(
+                product_count=('variant_id', 'count'),
+                offers_count=('is_offer_bool', 'sum')
+            ).reset_index()
             
             # Calculate offer percentage
-            offer_patterns['offer_percentage'] = (offer_patterns['is_offer'] / offer_patterns['variant_id'] * 100).round(2)
-            offer_patterns.columns = ['l1_category', 'l2_category', 'lat', 'lng', 'product_count', 'offers_count', 'offer_percentage']
+            offer_patterns['offer_percentage'] = self._offer_percentage(offer_patterns['offers_count'], offer_patterns['product_count'])
             
             # Save to CSV
             pattern_file = f"{self.output_dir}/offer_patterns.csv"
             offer_patterns.to_csv(pattern_file, index=False)
-            print(f"Saved offer patterns to {pattern_file}")
+            logger.info("Saved offer patterns to %s", pattern_file)
             return pattern_file
             
         except Exception as e:
-            print(f"Error analyzing offer patterns: {str(e)}")
+            logger.error("Error analyzing offer patterns: %s", e)
             return None
\ No newline at end of file
@@ -1,46 +1,158 @@
 import time
 import json
+import logging
 import random
 import os
 import re
+import hashlib
+import importlib.util
+from functools import lru_cache, partial
+from urllib.parse import urlsplit, parse_qs
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from geopy.geocoders import Nominatim
 
+# RequestsAdapter is importable without requests but fails when used
+if importlib.util.find_spec("requests") is not None:
+    from geopy.adapters import RequestsAdapter
+else:
+    RequestsAdapter = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = None
+
+logger = logging.getLogger(__name__)
+
+# Category listing URLs: /cn/<l1>/<l2>/cid/<l1_id>/<l2_id>
+_CATEGORY_URL_RE = re.compile(r"/cn/([^/]+)/([^/]+)/cid/(\d+)/(\d+)")
+
+# Pagination counters in a listing response's next_url
+_TOTAL_ITEMS_RE = re.compile(r"total_pagination_items=(\d+)")
+_ENTITIES_PROCESSED_RE = re.compile(r"total_entities_processed=(\d+)")
+_PAGE_INDEX_RE = re.compile(r"page_index=(\d+)")
+
+# Shared stand-in for missing nested dicts while walking a response; never mutated
+_EMPTY = {}
+
+# Product cards in the category grid
+PRODUCT_CARD_SELECTOR = "div > div > div[style*='grid-column: span']"
+
+# Reverse-geocoded addresses kept in the output directory, so reruns skip Nominatim
+GEOCODE_CACHE_FILE = ".geocache.json"
+
+# How far (in degrees, about 5 km) the page's ?latitude=&longitude= may be from the requested
+# coordinates. The address search lands on the chosen result's coordinates, not the exact
+# point, but a URL left over from a previous job's location is further off than this.
+LOCATION_TOLERANCE = 0.05
+
+# Cookies saved after setting each location, so later sessions can restore it without the UI
+LOCATION_COOKIES_DIR = "locations"
+
+# Fields of a CDP Network.Cookie that Network.setCookies accepts back
+_COOKIE_PARAM_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires")
+
+# One geolocator per process, shared by every scraper instance
+_geolocator = None
+
+def get_geolocator():
+    """Return this process's Nominatim geolocator, creating it on first use"""
+    global _geolocator
+    if _geolocator is None:
+        options = {}
+        if RequestsAdapter is not None:
+            # Pooled keep-alive session: repeat lookups reuse the TLS connection to Nominatim
+            options["adapter_factory"] = partial(RequestsAdapter, pool_connections=1, pool_maxsize=4)
+        _geolocator = Nominatim(user_agent="blinkit_api_scraper", **options)
+    return _geolocator
+
+@lru_cache(maxsize=4096)
+def _reverse_geocode(lat, lon):
+    """Address for coordinates rounded to 5 decimal places (about 1 m); failures are not cached"""
+    return get_geolocator().reverse(f"{lat}, {lon}").address
+
 class BlinkitAPIScraper:
-    def __init__(self, initial_url, lat=None, lng=None, output_dir="blinkit_data", driver=None):
+    # Locators set_location tries for each step, most specific first
+    LOCATION_BUTTON_SELECTORS = (
+        (By.CSS_SELECTOR, ".LocationBar__Container-sc-x8ezho-6"),
+        (By.CSS_SELECTOR, ".LocationBar__Container"),
+        (By.CSS_SELECTOR, "[data-testid='location-button']"),
+        (By.XPATH, "//div[contains(text(), 'Deliver to')]"),
+        (By.XPATH, "//button[contains(@class, 'LocationBar')]")
+    )
+    LOCATION_INPUT_SELECTORS = (
+        (By.CSS_SELECTOR, "input[name='select-locality']"),
+        (By.CSS_SELECTOR, "input[placeholder*='search delivery location']"),
+        (By.CSS_SELECTOR, "input[placeholder*='location']"),
+        (By.CSS_SELECTOR, ".LocationSearchBox__InputSelect"),
+        (By.XPATH, "//input[contains(@placeholder, 'location')]")
+    )
+    LOCATION_RESULT_SELECTORS = (
+        (By.CSS_SELECTOR, ".LocationSearchList__LocationDetailContainer-sc-93rfr7-1"),
+        (By.CSS_SELECTOR, ".LocationSearchList__LocationDetailContainer"),
+        (By.CSS_SELECTOR, "[data-testid='location-search-result']"),
+        (By.XPATH, "//div[contains(@class, 'LocationSearch')]"),
+        (By.XPATH, "//div[contains(text(), 'Delhi') or contains(text(), 'New Delhi')]")
+    )
+    
+    def __init__(self, initial_url, lat=None, lng=None, output_dir="blinkit_data", driver=None,
+                 scroll_wait=4.0, scroll_jitter=1.5):
         self.output_dir = output_dir
+        # Longest wait for the next page after a scroll: scroll_wait plus up to scroll_jitter
+        # random seconds. The wait ends as soon as the page has loaded.
+        self.scroll_wait = scroll_wait
+        self.scroll_jitter = scroll_jitter
+        # Responses captured while waiting for the page, not yet handed to scroll_page
         self.api_responses = []
-        self.current_lat = lat
-        self.current_lng = lng
+        # Location requested for this session; current_lat/lng are only set once the page has it
+        self.initial_lat = lat
+        self.initial_lng = lng
+        self.current_lat = None
+        self.current_lng = None
         self.current_category_name = None
         self.current_category_url = initial_url
         self.driver = driver
         
-        # Initialize geolocator for address lookup
-        self.geolocator = Nominatim(user_agent="blinkit_api_scraper")
+        # Request ids and body digests already captured for the current category
+        self._seen_request_ids = set()
+        self._body_hashes = set()
+        # Listing requests whose response started but whose body hasn't finished loading
+        self._pending_request_ids = set()
+        
+        # Geolocator for address lookup, shared across scrapers in this process
+        self.geolocator = get_geolocator()
+        self._geocache_path = os.path.join(self.output_dir, GEOCODE_CACHE_FILE)
+        self._geocache = self._read_geocache()
         
         # Create output directory if it doesn't exist
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
     
     def start_session(self):
-        """Initialize the session by navigating to the initial URL"""
-        print(f"Starting session with URL: {self.current_category_url}")
+        """
+        Initialize the session by navigating to the initial URL
+        
+        Returns False if coordinates were given but the location could not be set,
+        in which case the page still shows some other location's products.
+        """
+        logger.debug("Starting session with URL: %s", self.current_category_url)
         self.driver.get(self.current_category_url)
         
-        # Wait for the page to load
-        time.sleep(10)
+        # Wait for the page's first listing response rather than a fixed delay
+        self._wait_for_new_responses(timeout=10)
         
         # Set location if coordinates were provided
-        if self.current_lat and self.current_lng:
-            self.set_location(self.current_lat, self.current_lng)
+        if self.initial_lat and self.initial_lng:
+            return self.set_location(self.initial_lat, self.initial_lng)
+        return True
     
     def extract_category_name(self, url):
-        pattern = r"/cn/([^/]+)/([^/]+)/cid/(\d+)/(\d+)"
-        match = re.search(pattern, url)
+        match = _CATEGORY_URL_RE.search(url)
         
         if match:
             l1_category = match.group(1)
@@ -79,57 +191,98 @@ class BlinkitAPIScraper:
         
     def get_address_from_coordinates(self, lat, lon):
         """Get address from coordinates using geopy"""
+        lat, lon = round(float(lat), 5), round(float(lon), 5)
+        key = f"{lat},{lon}"
+        address = self._geocache.get(key)
+        if address is not None:
+            return address
         try:
-            location = self.geolocator.reverse(f"{lat}, {lon}")
-            return location.address
+            # Cached per process, so each location hits Nominatim once however many jobs use it
+            address = _reverse_geocode(lat, lon)
         except Exception as e:
-            print(f"Error getting address from coordinates: {str(e)}")
+            logger.warning("Error getting address from coordinates: %s", e)
             return "Unknown location"
+        self._geocache[key] = address
+        self._write_geocache()
+        return address
 
+    def _read_geocache(self):
+        """Load the on-disk geocode cache, empty if missing or unreadable"""
+        try:
+            with open(self._geocache_path, 'r', encoding='utf-8') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _write_geocache(self):
+        """
+        Save the geocode cache, merged with entries other worker processes wrote
+        
+        Written to a temporary file and swapped in with os.replace, so a reader
+        never sees a partially written cache.
+        """
+        cache = self._read_geocache()
+        cache.update(self._geocache)
+        self._geocache = cache
+        tmp_path = f"{self._geocache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(cache, file, ensure_ascii=False)
+            os.replace(tmp_path, self._geocache_path)
+        except OSError as e:
+            logger.warning("Could not save geocode cache: %s", e)
+
+    def _find_by_priority(self, selectors, clickable=False, timeout=5):
+        """
+        Wait once for any of selectors to match, then return the matches of the
+        earliest selector in the list that has any
+        
+        selectors are (By, value) locators. One wait for all of them bounds the
+        search at timeout seconds instead of timeout per selector.
+        """
+        condition = EC.element_to_be_clickable if clickable else EC.presence_of_element_located
+        try:
+            WebDriverWait(self.driver, timeout).until(EC.any_of(*(condition(locator) for locator in selectors)))
+        except TimeoutException:
+            return []
+        
+        # Earlier selectors are more specific, so they win over the generic fallbacks
+        for locator in selectors:
+            try:
+                elements = self.driver.find_elements(*locator)
+                if clickable:
+                    elements = [element for element in elements if element.is_displayed() and element.is_enabled()]
+            except WebDriverException:
+                continue
+            if elements:
+                return elements
+        return []
+    
     def set_location(self, lat, lng):
         """Set location using latitude and longitude"""
         # Skip if location is already set to these coordinates
         if self.current_lat == lat and self.current_lng == lng:
-            print(f"Location already set to {lat}, {lng}")
+            logger.debug("Location already set to %s, %s", lat, lng)
             return True
             
-        print(f"Setting location to coordinates: {lat}, {lng}")
-        self.current_lat = lat
-        self.current_lng = lng
-        
-        # Get address to search
-        address = self.get_address_from_coordinates(lat, lng)
-        print(f"Searching for address: {address}")
-        
-        # Wait for page to load fully
-        time.sleep(5)
+        logger.debug("Setting location to coordinates: %s, %s", lat, lng)
+        # Cleared until the page confirms the new location, so a failed attempt can be retried
+        self.current_lat = None
+        self.current_lng = None
+        
+        # Cheap path: restore the cookies a previous run saved for these coordinates
+        if self._restore_location_cookies(lat, lng):
+            logger.debug("Location restored from saved cookies")
+            self.current_lat = lat
+            self.current_lng = lng
+            return True
         
-        # Try different possible selectors for the location button
+        # Try different possible selectors for the location button (waits for the page to render it)
         location_button = None
-        possible_button_selectors = [
-            ".LocationBar__Container-sc-x8ezho-6",
-            ".LocationBar__Container",
-            "[data-testid='location-button']",
-            "//div[contains(text(), 'Deliver to')]",
-            "//button[contains(@class, 'LocationBar')]"
-        ]
-        
-        for selector in possible_button_selectors:
-            try:
-                if selector.startswith("//"):
-                    # XPath selector
-                    location_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                else:
-                    # CSS selector
-                    location_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                if location_button:
-                    break
-            except:
-                continue
+        buttons = self._find_by_priority(self.LOCATION_BUTTON_SELECTORS, clickable=True)
+        if buttons:
+            location_button = buttons[0]
         
         if not location_button:
             # Fallback: Try to find any element that looks like a location button
@@ -140,104 +293,129 @@ class BlinkitAPIScraper:
                     break
         
         if not location_button:
-            print("Could not find location button")
+            logger.warning("Could not find location button")
             return False
         
         # Click location button
-        self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", location_button)
-        time.sleep(0.5)
+        self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", location_button)
         self.driver.execute_script("arguments[0].click();", location_button)
-        time.sleep(2)
         
-        # Wait for search input with various possible selectors
+        # Wait for search input with various possible selectors (the modal opens after the click)
         search_input = None
-        possible_input_selectors = [
-            "input[name='select-locality']",
-            "input[placeholder*='search delivery location']",
-            "input[placeholder*='location']",
-            ".LocationSearchBox__InputSelect",
-            "//input[contains(@placeholder, 'location')]"
-        ]
-        
-        for selector in possible_input_selectors:
-            try:
-                if selector.startswith("//"):
-                    search_input = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                else:
-                    search_input = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                    )
-                if search_input:
-                    break
-            except:
-                continue
+        inputs = self._find_by_priority(self.LOCATION_INPUT_SELECTORS, clickable=True)
+        if inputs:
+            search_input = inputs[0]
         
         if not search_input:
-            print("Could not find search input")
+            logger.warning("Could not find search input")
             return False
         
+        # Get address to search, only now that there is somewhere to type it
+        address = self.get_address_from_coordinates(lat, lng)
+        logger.debug("Searching for address: %s", address)
+        
         # Clear and enter address
         search_input.clear()
-        time.sleep(0.3)
         
         # Type search query
         query_text = address.split(',')[0].strip()
-        print(f"Typing search query: {query_text}")
+        logger.debug("Typing search query: %s", query_text)
         search_input.send_keys(query_text)
         
-        # Wait for search results to appear
-        time.sleep(3)
-        
         # Try different possible selectors for search results
         results_found = False
-        possible_results_selectors = [
-            ".LocationSearchList__LocationDetailContainer-sc-93rfr7-1",
-            ".LocationSearchList__LocationDetailContainer",
-            "[data-testid='location-search-result']",
-            "//div[contains(@class, 'LocationSearch')]",
-            "//div[contains(text(), 'Delhi') or contains(text(), 'New Delhi')]"
-        ]
-        
-        for selector in possible_results_selectors:
+        # Wait for an actual result row first: the generic fallbacks also match the search
+        # box itself, so they're only tried once the specific selectors have had their chance
+        search_results = (
+            self._find_by_priority(self.LOCATION_RESULT_SELECTORS[:3], timeout=8)
+            or self._find_by_priority(self.LOCATION_RESULT_SELECTORS, timeout=2)
+        )
+        if search_results:
             try:
-                if selector.startswith("//"):
-                    search_results = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_all_elements_located((By.XPATH, selector))
-                    )
-                else:
-                    search_results = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                    )
-                
-                if search_results and len(search_results) > 0:
-                    # Click the first result
-                    self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", search_results[0])
-                    time.sleep(0.5)
-                    self.driver.execute_script("arguments[0].click();", search_results[0])
-                    results_found = True
-                    break
-            except:
-                continue
+                # Click the first result
+                self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", search_results[0])
+                self.driver.execute_script("arguments[0].click();", search_results[0])
+                results_found = True
+            except WebDriverException:
+                pass
         
         if not results_found:
             # Last resort: Try to send Enter key
             try:
                 search_input.send_keys("\n")
-                time.sleep(5)
             except:
                 pass
         
-        # Wait for page to reload with new location
-        time.sleep(10)
+        # Wait for page to reload with new location, verified by the URL parameters
+        try:
+            WebDriverWait(self.driver, 15).until(lambda driver: self._url_has_location(driver.current_url, lat, lng))
+            logger.debug("Location set successfully")
+            self.current_lat = lat
+            self.current_lng = lng
+            self._save_location_cookies(lat, lng)
+            return True
+        except TimeoutException:
+            logger.warning("Could not confirm location was set")
+            return False
+
+    def _url_has_location(self, url, lat, lng):
+        """
+        Whether url's latitude/longitude parameters are within LOCATION_TOLERANCE of lat, lng
+        
+        Checking the values, not just that the parameters are present, matters
+        because worker browsers are reused: the URL may still carry the
+        previous job's location.
+        """
+        params = parse_qs(urlsplit(url).query)
+        try:
+            url_lat = float(params["latitude"][0])
+            url_lng = float(params["longitude"][0])
+        except (KeyError, IndexError, ValueError):
+            return False
+        return abs(url_lat - float(lat)) <= LOCATION_TOLERANCE and abs(url_lng - float(lng)) <= LOCATION_TOLERANCE
+
+    def _location_cookies_path(self, lat, lng):
+        return os.path.join(self.output_dir, LOCATION_COOKIES_DIR, f"{lat}_{lng}.json")
+
+    def _save_location_cookies(self, lat, lng):
+        """Save the browser's cookies once the UI flow has set the location"""
+        try:
+            cookies = self.driver.execute_cdp_cmd("Network.getCookies", {})["cookies"]
+            params = []
+            for cookie in cookies:
+                param = {field: cookie[field] for field in _COOKIE_PARAM_FIELDS if field in cookie}
+                # Session cookies report expires=-1, which setCookies would treat as already expired
+                if cookie.get("session") or param.get("expires", 0) < 0:
+                    param.pop("expires", None)
+                params.append(param)
+            
+            path = self._location_cookies_path(lat, lng)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(params, file)
+        except (OSError, KeyError, WebDriverException) as e:
+            logger.warning("Could not save location cookies: %s", e)
+
+    def _restore_location_cookies(self, lat, lng):
+        """
+        Set the cookies saved for these coordinates and reload the page
+        
+        Returns True if the reloaded page picked up the location (same URL check
+        as the UI flow). Otherwise returns False so the UI flow runs and saves fresh cookies.
+        """
+        try:
+            with open(self._location_cookies_path(lat, lng), 'r', encoding='utf-8') as file:
+                cookies = json.load(file)
+        except (OSError, ValueError):
+            return False
         
-        # Verify location was set by checking URL parameters
-        if "?latitude=" in self.driver.current_url or "visibility?latitude=" in self.driver.current_url:
-            print("Location set successfully")
+        try:
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            self.driver.refresh()
+            WebDriverWait(self.driver, 5).until(lambda driver: self._url_has_location(driver.current_url, lat, lng))
             return True
-        else:
-            print("Could not confirm location was set")
+        except (TimeoutException, WebDriverException):
+            logger.info("Saved location cookies were not accepted, setting location through the page")
             return False
 
     def update_location(self, lat, lng):
@@ -252,49 +430,96 @@ class BlinkitAPIScraper:
             # Get network logs
             logs = self.driver.get_log("performance")
             
-            # Track which requests we've already processed
-            processed_request_ids = set()
-            
             for log_entry in logs:
+                # Most entries are unrelated network/page events: skip them on the raw
+                # text instead of parsing every one
+                message = log_entry.get("message", "")
+                if "Network.loadingFinished" in message:
+                    if not self._pending_request_ids:
+                        continue
+                elif "Network.responseReceived" not in message or "v1/layout/listing_widgets" not in message:
+                    continue
+                
                 try:
-                    log_data = json.loads(log_entry["message"])["message"]
+                    log_data = _json_loads(message)["message"]
+                    request_id = log_data["params"]["requestId"]
                     
-                    # Check if this is a Network response
+                    # Listing response headers arrived: remember the request until its body finishes loading
                     if "Network.responseReceived" in log_data["method"]:
                         response_url = log_data["params"]["response"]["url"]
                         
                         # Check if this is the API we're interested in
                         if "v1/layout/listing_widgets" in response_url:
-                            request_id = log_data["params"]["requestId"]
-                            
-                            # Skip if we've already processed this request
-                            if request_id in processed_request_ids:
+                            # Skip if we've already processed this request, in this or an earlier call
+                            if request_id in self._seen_request_ids:
                                 continue
                                 
-                            processed_request_ids.add(request_id)
-                            
-                            # Get response body
-                            response_body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
-                            
-                            if response_body and "body" in response_body:
-                                # Parse the JSON response
-                                json_data = json.loads(response_body["body"])
-                                api_data.append(json_data)
-                except:
+                            self._seen_request_ids.add(request_id)
+                            self._pending_request_ids.add(request_id)
+                        continue
+                    
+                    # Body complete: only now is getResponseBody guaranteed to have all of it
+                    if log_data["method"] != "Network.loadingFinished" or request_id not in self._pending_request_ids:
+                        continue
+                    self._pending_request_ids.discard(request_id)
+                    
+                    # Get response body
+                    response_body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                    
+                    if response_body and "body" in response_body:
+                        # Re-scrolls can re-fetch an identical page: skip bodies already seen
+                        body = response_body["body"]
+                        body_bytes = body.encode("utf-8") if isinstance(body, str) else body
+                        body_hash = hashlib.blake2b(body_bytes, digest_size=16).digest()
+                        if body_hash in self._body_hashes:
+                            continue
+                        self._body_hashes.add(body_hash)
+                        
+                        # Parse the JSON response
+                        json_data = _json_loads(body)
+                        api_data.append(json_data)
+                except (ValueError, KeyError, TypeError, WebDriverException) as e:
+                    # Only listing entries get this far, so a failure here is a lost page: report it
+                    logger.warning("Skipping listing response: %s: %s", type(e).__name__, e)
                     continue
                     
         except Exception as e:
-            print(f"Error extracting API responses: {str(e)}")
+            logger.warning("Error extracting API responses: %s", e)
+            
+        return api_data
+    
+    def _wait_for_new_responses(self, timeout, poll_interval=0.25):
+        """
+        Poll the performance log until a new listing response is captured or timeout
+        seconds pass. Captured responses are buffered in self.api_responses.
+        
+        Returns True if a response arrived before the timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            new_api_data = self.extract_api_responses()
+            if new_api_data:
+                self.api_responses.extend(new_api_data)
+                return True
             
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll_interval, remaining))
+    
+    def _take_responses(self):
+        """Return buffered responses plus any newly logged ones, emptying the buffer"""
+        api_data = self.api_responses + self.extract_api_responses()
+        self.api_responses = []
         return api_data
     
-    def scroll_page(self, max_scrolls=25):
+    def scroll_page(self, max_scrolls=100):
         """Scroll the page to trigger API requests and return the API responses"""
-        print("Starting to scroll page to trigger API requests...")
+        logger.debug("Starting to scroll page to trigger API requests...")
         
         # Extract initial responses (important for pages with few products)
-        initial_api_data = self.extract_api_responses()
-        print(f"Initially found {len(initial_api_data)} API responses")
+        initial_api_data = self._take_responses()
+        logger.debug("Initially found %d API responses", len(initial_api_data))
         
         # Use a dictionary to track unique API responses by URL to avoid duplicates
         api_responses_by_url = {}
@@ -318,16 +543,16 @@ class BlinkitAPIScraper:
                 else:
                     # No next_url means we're on the last page already
                     more_pages_exist = False
-                    print("No pagination URL found in initial response - might be single page")
+                    logger.debug("No pagination URL found in initial response - might be single page")
                 
             # Look for total_pagination_items in the response
             if 'response' in response and 'pagination' in response['response'] and 'next_url' in response['response']['pagination']:
                 pagination_url = response['response']['pagination']['next_url']
                 # Extract total_pagination_items from URL if present
-                match = re.search(r'total_pagination_items=(\d+)', pagination_url)
+                match = _TOTAL_ITEMS_RE.search(pagination_url)
                 if match:
                     total_pagination_items = int(match.group(1))
-                    print(f"Found total_pagination_items: {total_pagination_items}")
+                    logger.debug("Found total_pagination_items: %s", total_pagination_items)
         
         # Find the container to verify it exists
         container_exists = False
@@ -335,10 +560,10 @@ class BlinkitAPIScraper:
             container = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "plpContainer"))
             )
-            print("Found product container for scrolling")
+            logger.debug("Found product container for scrolling")
             container_exists = True
         except TimeoutException:
-            print("Warning: Product container not found. Will use window scrolling.")
+            logger.warning("Product container not found. Will use window scrolling.")
         
         # Scroll several times with pauses
         scroll_count = 0
@@ -350,7 +575,7 @@ class BlinkitAPIScraper:
             try:
                 # If we know for sure there's no more pages, exit immediately
                 if not more_pages_exist:
-                    print("Stopped scrolling: No more pagination URLs found")
+                    logger.debug("Stopped scrolling: No more pagination URLs found")
                     break
                # Calculate scroll distance that increases with each iteration
                 base_scroll = 800
@@ -371,173 +596,190 @@ class BlinkitAPIScraper:
                     # Fall back to window scrolling
                     self.driver.execute_script(f"window.scrollBy(0, {scroll_distance});")
                 
-                # Wait after scrolling - slightly longer wait for better page loading
-                wait_time = 4 + random.uniform(0, 1.5)
-                time.sleep(wait_time)
-                                
-                # Wait for network to become idle before continuing
-                try:
-                    self.driver.execute_script("""
-                        return new Promise(resolve => {
-                            const checkNetworkIdle = () => {
-                                const pending = performance.getEntriesByType('resource')
-                                    .filter(r => !r.responseEnd && r.name.includes('listing_widgets'));
-                                if (pending.length === 0) {
-                                    resolve(true);
-                                } else {
-                                    setTimeout(checkNetworkIdle, 500);
-                                }
-                            };
-                            checkNetworkIdle();
-                        });
-                    """)
-                except:
-                    # Fallback - just wait additional time
-                    time.sleep(3)
-                    
+                # Wait after scrolling until the next page of results has finished loading
+                wait_time = self.scroll_wait + random.uniform(0, self.scroll_jitter)
+                self._wait_for_new_responses(timeout=wait_time)
+                
                 # Extract API responses after scrolling
-                new_api_data = self.extract_api_responses()
+                new_api_data = self._take_responses()
                 
                 # Process and deduplicate new responses
+                merged = []
                 for response in new_api_data:
                     response_key = self._create_response_key(response)
                     if response_key not in api_responses_by_url:
                         api_responses_by_url[response_key] = response
+                        merged.append(response)
                 
-                # Check for pagination info in all responses
-                more_pages_exist = False  # Reset flag, will set to True if we find valid next_url
-                for response in api_responses_by_url.values():
-                    if 'response' in response and 'pagination' in response['response']:
-                        # Case 1: No next_url means we're on the last page
-                        if 'next_url' not in response['response']['pagination']:
-                            continue
-                            
-                        # Case 2: We have a next_url to check
-                        new_pagination_url = response['response']['pagination']['next_url']
+                # Check pagination info in the responses merged by this scroll only: earlier
+                # ones were checked when they arrived. With nothing new the flag is left as is
+                # and the no-new-responses counter decides when to stop.
+                for response in merged:
+                    body = response.get('response')
+                    pagination = body.get('pagination') if isinstance(body, dict) else None
+                    # No next_url means the last page, which _is_last_page handles below
+                    if not isinstance(pagination, dict) or 'next_url' not in pagination:
+                        continue
+                    
+                    # Only count as a new pagination if URL is different
+                    new_pagination_url = pagination['next_url']
+                    if new_pagination_url == last_pagination_url:
+                        continue
+                    
+                    # Check if we've already processed all items
+                    entities_match = _ENTITIES_PROCESSED_RE.search(new_pagination_url)
+                    total_match = _TOTAL_ITEMS_RE.search(new_pagination_url)
+                    page_index_match = _PAGE_INDEX_RE.search(new_pagination_url)
+                    
+                    if entities_match and total_match:
+                        entities = int(entities_match.group(1))
+                        total = int(total_match.group(1))
                         
-                        # Only count as a new pagination if URL is different
-                        if new_pagination_url != last_pagination_url:
-                            # Check if we've already processed all items
-                            entities_match = re.search(r'total_entities_processed=(\d+)', new_pagination_url)
-                            total_match = re.search(r'total_pagination_items=(\d+)', new_pagination_url)
-                            page_index_match = re.search(r'page_index=(\d+)', new_pagination_url)
-                            
-                            if entities_match and total_match:
-                                entities = int(entities_match.group(1))
-                                total = int(total_match.group(1))
-                                
-                                if entities >= total:
-                                    print(f"Reached all products: {entities}/{total}")
-                                    more_pages_exist = False
-                                    break
-                            
-                            if page_index_match and total_match:
-                                page_index = int(page_index_match.group(1))
-                                total_items = int(total_match.group(1))
-                                items_per_page = 15  # Based on limit=15 in URL
-                                
-                                total_pages = (total_items + items_per_page - 1) // items_per_page
-                                if page_index >= total_pages - 1:
-                                    print(f"Detected last pagination page: {page_index+1} of {total_pages}")
-                                    more_pages_exist = False
-                                    break
-                            
-                            # If we got here, we have a valid new pagination URL
-                            more_pages_exist = True
-                            last_pagination_url = new_pagination_url
-                            
-                            # Update total_pagination_items if available
-                            if total_match:
-                                new_total = int(total_match.group(1))
-                                if total_pagination_items is None or new_total > total_pagination_items:
-                                    total_pagination_items = new_total
-                                    print(f"Updated total_pagination_items: {total_pagination_items}")
-                        else:
-                            # If we see the same pagination URL repeatedly, it's likely we're at the end
-                            pass
+                        if entities >= total:
+                            logger.debug("Reached all products: %d/%d", entities, total)
+                            more_pages_exist = False
+                            break
+                    
+                    if page_index_match and total_match:
+                        page_index = int(page_index_match.group(1))
+                        total_items = int(total_match.group(1))
+                        items_per_page = 15  # Based on limit=15 in URL
+                        
+                        total_pages = (total_items + items_per_page - 1) // items_per_page
+                        if page_index >= total_pages - 1:
+                            logger.debug("Detected last pagination page: %d of %d", page_index + 1, total_pages)
+                            more_pages_exist = False
+                            break
+                    
+                    # If we got here, we have a valid new pagination URL
+                    more_pages_exist = True
+                    last_pagination_url = new_pagination_url
+                    
+                    # Update total_pagination_items if available
+                    if total_match:
+                        new_total = int(total_match.group(1))
+                        if total_pagination_items is None or new_total > total_pagination_items:
+                            total_pagination_items = new_total
+                            logger.debug("Updated total_pagination_items: %s", total_pagination_items)
+                
+                # The backend omits next_url on its last page: stop as soon as that page arrives
+                # rather than spending the no-new-responses budget on empty scrolls
+                if any(self._is_last_page(response) for response in new_api_data):
+                    logger.debug("Backend returned its last page")
+                    more_pages_exist = False
                 
                 # Check if we've found new API responses
                 current_response_count = len(api_responses_by_url)
                 if current_response_count > last_response_count:
                     new_responses = current_response_count - last_response_count
-                    print(f"Scroll {scroll_count+1}: Found {new_responses} new API responses, total: {current_response_count}")
+                    logger.debug("Scroll %d: Found %d new API responses, total: %d", scroll_count + 1, new_responses, current_response_count)
                     last_response_count = current_response_count
                     consecutive_no_new = 0
                 else:
                     consecutive_no_new += 1
-                    print(f"Scroll {scroll_count+1}: No new responses ({consecutive_no_new}/{max_consecutive_no_new} consecutive)")
+                    logger.debug("Scroll %d: No new responses (%d/%d consecutive)", scroll_count + 1, consecutive_no_new, max_consecutive_no_new)
                 
-                # Occasional random product movement (helps trigger lazy loading)
-                if random.random() > 0.7:
+                # Occasional random product movement (helps trigger lazy loading), pointless
+                # once the last page is in
+                if more_pages_exist and random.random() > 0.7:
                     try:
-                        products = self.driver.find_elements(By.CSS_SELECTOR, "div > div > div[style*='grid-column: span']")
-                        if products and len(products) > 0:
-                            random_product = random.choice(products)
-                            self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", random_product)
+                        # Pick and scroll to the card in the page: one round trip instead of one per card
+                        moved = self.driver.execute_script("""
+                            const cards = document.querySelectorAll(arguments[0]);
+                            if (!cards.length) {
+                                return false;
+                            }
+                            cards[Math.floor(Math.random() * cards.length)]
+                                .scrollIntoView({behavior: 'smooth', block: 'center'});
+                            return true;
+                        """, PRODUCT_CARD_SELECTOR)
+                        if moved:
                             time.sleep(2)
                     except Exception as e:
-                        print(f"Error selecting random product: {str(e)}")
+                        logger.debug("Error selecting random product: %s", e)
                         pass
                         
                 scroll_count += 1
                 
             except Exception as e:
-                print(f"Error during scrolling: {str(e)}")
+                logger.warning("Error during scrolling: %s", e)
                 time.sleep(1)
         
         # Final check for reason we stopped scrolling
         if not more_pages_exist:
-            print("Stopped scrolling: No more pagination URLs found")
+            logger.debug("Stopped scrolling: No more pagination URLs found")
         elif consecutive_no_new >= max_consecutive_no_new:
-            print(f"Stopped scrolling: No new data after {max_consecutive_no_new} consecutive attempts")
+            logger.debug("Stopped scrolling: No new data after %d consecutive attempts", max_consecutive_no_new)
         else:
-            print(f"Stopped scrolling: Reached maximum scroll limit ({max_scrolls})")
+            logger.debug("Stopped scrolling: Reached maximum scroll limit (%d)", max_scrolls)
             
-        print(f"Scrolling complete after {scroll_count} scrolls. Captured {len(api_responses_by_url)} unique API responses")
+        logger.debug("Scrolling complete after %d scrolls. Captured %d unique API responses", scroll_count, len(api_responses_by_url))
         return list(api_responses_by_url.values())
 
+    def _is_last_page(self, response):
+        """Whether response is a paginated listing page with no next_url or no products, i.e. the final page"""
+        body = response.get('response')
+        pagination = body.get('pagination') if isinstance(body, dict) else None
+        if not isinstance(pagination, dict):
+            return False
+        return 'next_url' not in pagination or body.get('snippets') == []
+    
     def _create_response_key(self, response):
         """Create a unique key for an API response to avoid duplicates"""
+        body = response.get('response')
+        if not isinstance(body, dict):
+            body = _EMPTY
+        
         # If response has a pagination URL, use that as it's unique
-        if 'response' in response and 'pagination' in response['response'] and 'next_url' in response['response']['pagination']:
-            return response['response']['pagination']['next_url']
+        next_url = (body.get('pagination') or _EMPTY).get('next_url')
+        if next_url is not None:
+            return next_url
         
         # If response has postback params with shown_product_count, use that
-        if 'postback_params' in response and 'shown_product_count' in response['postback_params']:
-            return f"products_{response['postback_params']['shown_product_count']}"
+        postback_params = response.get('postback_params') or _EMPTY
+        if 'shown_product_count' in postback_params:
+            return f"products_{postback_params['shown_product_count']}"
         
         # If we have tracking data with an ID, use that
-        if 'response' in response and 'tracking' in response['response'] and 'le_meta' in response['response']['tracking']:
-            if 'id' in response['response']['tracking']['le_meta']:
-                return f"tracking_{response['response']['tracking']['le_meta']['id']}"
-        
-        # Last resort, use string representation of the response
-        import hashlib
-        return hashlib.md5(str(response).encode()).hexdigest()
+        le_meta = (body.get('tracking') or _EMPTY).get('le_meta') or _EMPTY
+        if 'id' in le_meta:
+            return f"tracking_{le_meta['id']}"
+        
+        # Last resort, digest the serialized response. orjson serializes far faster than
+        # str(); without it str() still beats json.dumps
+        payload = _json_dumps(response) if _json_dumps is not None else str(response).encode()
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
 
     def navigate_to_category(self, category_url):
         """Navigate to a category URL"""
-        print(f"Navigating to category URL: {category_url}")
+        logger.debug("Navigating to category URL: %s", category_url)
         self.current_category_url = category_url
         self.current_category_name = self.extract_category_name(category_url)["name"]
+        self._seen_request_ids.clear()
+        self._body_hashes.clear()
+        self._pending_request_ids.clear()
+        
+        # Drop responses still pending from the previous page so they aren't counted for this category
+        self.api_responses.clear()
+        self.driver.get_log("performance")
         self.driver.get(category_url)
         
-        # Wait for the page to load
-        time.sleep(10)
+        # Wait for the category's first listing response rather than a fixed delay
+        self._wait_for_new_responses(timeout=10)
         
         # Check if products loaded
         try:
             container = WebDriverWait(self.driver, 15).until(
                 EC.presence_of_element_located((By.ID, "plpContainer"))
             )
-            product_cards = container.find_elements(By.CSS_SELECTOR, "div > div > div[style*='grid-column: span']")
-            print(f"Page loaded successfully. Found {len(product_cards)} product cards")
+            product_cards = container.find_elements(By.CSS_SELECTOR, PRODUCT_CARD_SELECTOR)
+            logger.debug("Page loaded successfully. Found %d product cards", len(product_cards))
             return True
         except:
-            print("Warning: Could not confirm page loaded successfully, but continuing anyway")
+            logger.warning("Could not confirm page loaded successfully, but continuing anyway")
             return True
     
-    def scrape_category(self, scroll_count=25):
+    def scrape_category(self, scroll_count=100):
         """Scrape the current category"""
         # Scroll to trigger API requests
         api_data = self.scroll_page(max_scrolls=scroll_count)